@@ -8,6 +8,10 @@ from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 from mailchimp_marketing import Client
 from mailchimp_marketing.api_client import ApiClientError
+from comun import (
+    validar_email, init_rating_schema,
+    update_ratings_db, update_ratings_mailchimp
+)
 
 # 1) Carga de variables de entorno
 load_dotenv()
@@ -40,9 +44,12 @@ def init_db():
             service_date     TEXT,
             subscribed       INTEGER DEFAULT 1,
             created_at       TEXT    NOT NULL,
-            unsubscribed_at  TEXT
+            unsubscribed_at  TEXT,
+            rating           INTEGER,
+            rated_at         TEXT
         )
     """)
+    init_rating_schema(conn)
     conn.commit()
     conn.close()
 
@@ -154,6 +161,69 @@ def unsubscribe():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
+@app.route("/ratings", methods=["POST"])
+def ratings():
+    data = request.get_json() or {}
+    items = data.get("ratings")
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "Falta campo: ratings"}), 400
+
+    # Validación; si un email se repite gana el último rating
+    pares = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or "email" not in item or "rating" not in item:
+            return jsonify({
+                "success": False,
+                "message": f"ratings[{i}]: se requieren email y rating"
+            }), 400
+        email = item["email"]
+        if not isinstance(email, str):
+            return jsonify({
+                "success": False,
+                "message": f"ratings[{i}]: el email debe ser texto"
+            }), 400
+        email = email.strip()
+        ok, msg = validar_email(email)
+        if not ok:
+            return jsonify({
+                "success": False,
+                "message": f"ratings[{i}]: {msg}"
+            }), 400
+        rating = item["rating"]
+        if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+            return jsonify({
+                "success": False,
+                "message": f"ratings[{i}]: el rating debe ser un entero entre 1 y 5"
+            }), 400
+        pares[email] = rating
+    pares = list(pares.items())
+
+    try:
+        # 5.5) Actualización local en una transacción
+        actualizados = update_ratings_db(DB_FILE, pares)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    encontrados = {email for email, _ in actualizados}
+    resultado = {
+        "updated":   len(actualizados),
+        "not_found": [email for email, _ in pares if email not in encontrados],
+        "batch_id":  None
+    }
+    if actualizados:
+        try:
+            # 5.6) Actualización en Mailchimp en un único batch, solo de los existentes
+            resultado["batch_id"] = update_ratings_mailchimp(mc, MC_LIST_ID, actualizados)
+        except Exception as e:
+            # Los ratings locales ya están confirmados: se informa el resultado parcial
+            return jsonify({
+                "success":         False,
+                "message":         "Ratings saved locally; Mailchimp update failed",
+                "mailchimp_error": str(e),
+                **resultado
+            }), 502
+    return jsonify({"success": True, "message": "Ratings updated", **resultado}), 200
+
 # 6) Ejecutar la aplicación
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Código compartido por app.py, suscripcion.py e importar_ratings.py."""
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime, timezone
+from mailchimp_marketing.api_client import ApiClientError
+
+# Máximo de parámetros por consulta IN (...) en SQLite antiguos
+MAX_PARAMS = 500
+
+def validar_email(email):
+    if not email or not email.strip():
+        return False, "El email no puede estar vacío"
+    patron_email = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if not re.match(patron_email, email):
+        return False, "Formato de email inválido"
+    return True, "Email válido"
+
+def init_rating_schema(conn):
+    """Crea las columnas de rating, la tabla de agregados diarios y sus triggers."""
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(subscriptions)")}
+    if "rating" not in columnas:
+        conn.execute("ALTER TABLE subscriptions ADD COLUMN rating INTEGER")
+    if "rated_at" not in columnas:
+        conn.execute("ALTER TABLE subscriptions ADD COLUMN rated_at TEXT")
+    # Agregados por día, mantenidos incrementalmente por los triggers
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rating_daily (
+            day           TEXT    PRIMARY KEY,
+            rating_count  INTEGER NOT NULL DEFAULT 0,
+            rating_sum    INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rating_daily_update
+        AFTER UPDATE OF rating, rated_at ON subscriptions
+        BEGIN
+            UPDATE rating_daily
+            SET rating_count = rating_count - 1,
+                rating_sum   = rating_sum - OLD.rating
+            WHERE OLD.rating IS NOT NULL
+              AND day = substr(OLD.rated_at, 1, 10);
+            INSERT INTO rating_daily (day, rating_count, rating_sum)
+            SELECT substr(NEW.rated_at, 1, 10), 1, NEW.rating
+            WHERE NEW.rating IS NOT NULL AND NEW.rated_at IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET
+                rating_count = rating_count + 1,
+                rating_sum   = rating_sum + excluded.rating_sum;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rating_daily_insert
+        AFTER INSERT ON subscriptions
+        WHEN NEW.rating IS NOT NULL AND NEW.rated_at IS NOT NULL
+        BEGIN
+            INSERT INTO rating_daily (day, rating_count, rating_sum)
+            VALUES (substr(NEW.rated_at, 1, 10), 1, NEW.rating)
+            ON CONFLICT(day) DO UPDATE SET
+                rating_count = rating_count + 1,
+                rating_sum   = rating_sum + excluded.rating_sum;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS rating_daily_delete
+        AFTER DELETE ON subscriptions
+        WHEN OLD.rating IS NOT NULL AND OLD.rated_at IS NOT NULL
+        BEGIN
+            UPDATE rating_daily
+            SET rating_count = rating_count - 1,
+                rating_sum   = rating_sum - OLD.rating
+            WHERE day = substr(OLD.rated_at, 1, 10);
+        END
+    """)
+    # Ratings antiguos sin fecha: se imputan al día de alta (dispara el trigger)
+    conn.execute("""
+        UPDATE subscriptions
+        SET rated_at = created_at
+        WHERE rating IS NOT NULL AND rated_at IS NULL
+    """)
+
+def update_ratings_db(db_file, ratings):
+    """
+    Aplica una lista de pares (email, rating) en una única transacción.
+    Devuelve los pares cuyo email existe en la base de datos.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    emails = [email for email, _ in ratings]
+    conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+    try:
+        # BEGIN IMMEDIATE toma el lock de escritura antes de leer filas;
+        # si falla no hay transacción abierta que deshacer
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existentes = set()
+            for i in range(0, len(emails), MAX_PARAMS):
+                lote = emails[i:i + MAX_PARAMS]
+                marcas = ", ".join("?" * len(lote))
+                existentes.update(fila[0] for fila in conn.execute(
+                    f"SELECT email FROM subscriptions WHERE email IN ({marcas})", lote
+                ))
+            actualizados = [(email, rating) for email, rating in ratings
+                            if email in existentes]
+            conn.executemany("""
+                UPDATE subscriptions
+                SET rating = ?, rated_at = ?
+                WHERE email = ?
+            """, [(rating, now, email) for email, rating in actualizados])
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return actualizados
+    finally:
+        conn.close()
+
+def update_ratings_mailchimp(mc, list_id, ratings):
+    """Envía los ratings a Mailchimp en una sola operación batch."""
+    operations = [
+        {
+            "method": "PATCH",
+            "path": f"/lists/{list_id}/members/"
+                    f"{hashlib.md5(email.lower().encode()).hexdigest()}",
+            "body": json.dumps({ "merge_fields": { "RATING": rating } })
+        }
+        for email, rating in ratings
+    ]
+    try:
+        batch = mc.batches.start({ "operations": operations })
+    except ApiClientError as e:
+        logging.error(f"Mailchimp rating batch error: {e.text}")
+        raise
+    return batch["id"]
@@ -17,6 +17,16 @@ def conectar_db():
         print(f" Error al conectar a la base de datos: {e}")
         return None
 
+def tiene_agregados_rating(cursor):
+    """Indica si la base de datos ya tiene la tabla rating_daily"""
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rating_daily'"
+    )
+    if cursor.fetchone():
+        return True
+    print("\n⚠️  Faltan los agregados de rating: ejecute app.py o suscripcion.py una vez para crearlos")
+    return False
+
 def mostrar_menu():
     """Muestra el menú principal"""
     print("\n" + "="*60)
@@ -26,6 +36,7 @@ def mostrar_menu():
     print("2) Buscar por email")
     print("3) Buscar por nombre")
     print("4) Ver estadísticas")
+    print("5) Ver ratings por día")
     print("0) Salir")
     print("="*60)
 
@@ -192,13 +203,13 @@ def mostrar_estadisticas():
         cursor.execute("SELECT COUNT(*) FROM subscriptions WHERE subscribed = 0")
         bajas = cursor.fetchone()[0]
         
-        # Usuarios con rating
-        cursor.execute("SELECT COUNT(*) FROM subscriptions WHERE rating IS NOT NULL")
-        con_rating = cursor.fetchone()[0]
-        
-        # Promedio de rating
-        cursor.execute("SELECT AVG(rating) FROM subscriptions WHERE rating IS NOT NULL")
-        avg_rating = cursor.fetchone()[0]
+        # Usuarios con rating y promedio, desde los agregados diarios
+        con_rating, avg_rating = None, None
+        if tiene_agregados_rating(cursor):
+            cursor.execute("SELECT SUM(rating_count), SUM(rating_sum) FROM rating_daily")
+            con_rating, suma_rating = cursor.fetchone()
+            con_rating = con_rating or 0
+            avg_rating = suma_rating / con_rating if con_rating else None
         
         # Último registro
         cursor.execute("SELECT created_at FROM subscriptions ORDER BY created_at DESC LIMIT 1")
@@ -209,7 +220,8 @@ def mostrar_estadisticas():
         print(f"👥 Total de usuarios: {total}")
         print(f"✅ Usuarios suscritos: {suscritos}")
         print(f"❌ Usuarios dados de baja: {bajas}")
-        print(f"⭐ Usuarios con rating: {con_rating}")
+        if con_rating is not None:
+            print(f"⭐ Usuarios con rating: {con_rating}")
         if avg_rating:
             print(f"📈 Promedio de rating: {avg_rating:.1f}/5")
         if ultimo:
@@ -221,6 +233,39 @@ def mostrar_estadisticas():
     finally:
         conn.close()
 
+def mostrar_ratings_por_dia():
+    """Muestra los agregados diarios de rating"""
+    conn = conectar_db()
+    if not conn:
+        return
+    
+    try:
+        cursor = conn.cursor()
+        if not tiene_agregados_rating(cursor):
+            return
+        cursor.execute("""
+            SELECT day, rating_count, rating_sum
+            FROM rating_daily
+            WHERE rating_count > 0
+            ORDER BY day DESC
+        """)
+        dias = cursor.fetchall()
+        
+        if not dias:
+            print("\n📭 No hay calificaciones registradas")
+            return
+        
+        print("\n⭐ RATINGS POR DÍA")
+        print("="*50)
+        for day, count, total in dias:
+            print(f"📅 {day}: {count} calificaciones, promedio {total / count:.1f}/5")
+        print("="*50)
+        
+    except Exception as e:
+        print(f"❌ Error al obtener ratings por día: {e}")
+    finally:
+        conn.close()
+
 def main():
     """Función principal"""
     while True:
@@ -236,6 +281,8 @@ def main():
         elif opcion == "4":
             mostrar_estadisticas()
             ()
+        elif opcion == "5":
+            mostrar_ratings_por_dia()
         elif opcion == "0":
             print("\n Hasta luego!")
             break
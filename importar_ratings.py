@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import csv
+import sys
+from suscripcion import (
+    init_db, validar_email, validar_rating,
+    update_ratings_db, update_ratings_mailchimp
+)
+
+def leer_ratings(ruta):
+    """Lee un CSV con columnas email,rating y devuelve los pares válidos"""
+    pares = {}
+    errores = []
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        for linea, fila in enumerate(csv.DictReader(f), 2):
+            email = (fila.get("email") or "").strip()
+            ok, msg = validar_email(email)
+            if not ok:
+                errores.append(f"Línea {linea}: {msg}")
+                continue
+            ok, val = validar_rating((fila.get("rating") or "").strip())
+            if not ok:
+                errores.append(f"Línea {linea}: {val or 'La calificación es obligatoria'}")
+                continue
+            # Si un email se repite gana el último rating
+            pares[email] = val
+    return list(pares.items()), errores
+
+def main():
+    """Función principal"""
+    if len(sys.argv) != 2:
+        print("Uso: importar_ratings.py <archivo.csv>")
+        sys.exit(1)
+
+    try:
+        pares, errores = leer_ratings(sys.argv[1])
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"❌ No se pudo leer el archivo: {e}")
+        sys.exit(1)
+
+    for error in errores:
+        print(f"❌ {error}")
+    if not pares:
+        print("\n📭 No hay calificaciones válidas para importar")
+        return
+
+    try:
+        init_db()
+        actualizados = update_ratings_db(pares)
+    except Exception as e:
+        print(f"\n Error al importar calificaciones: {e}\n")
+        sys.exit(1)
+
+    encontrados = {email for email, _ in actualizados}
+    for email, _ in pares:
+        if email not in encontrados:
+            print(f"❌ No existe el usuario: {email}")
+    print(f"\n✅ {len(actualizados)} calificaciones registradas de {len(pares)} leídas.")
+    if not actualizados:
+        return
+
+    try:
+        batch_id = update_ratings_mailchimp(actualizados)
+        print(f"📤 Batch de Mailchimp: {batch_id}\n")
+    except Exception as e:
+        # Los ratings locales ya están confirmados; no hace falta reimportarlos
+        print(f"\n Calificaciones guardadas localmente, pero falló Mailchimp: {e}\n")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,13 @@ from datetime import datetime, timezone
 from dotenv import load_dotenv
 from mailchimp_marketing import Client
 from mailchimp_marketing.api_client import ApiClientError
+from comun import (
+    validar_email, init_rating_schema,
+    update_ratings_db as _update_ratings_db,
+    update_ratings_mailchimp as _update_ratings_mailchimp
+)
 
 # --- Funciones de validación ---
-def validar_email(email):
-    if not email or not email.strip():
-        return False, "El email no puede estar vacío"
-    patron_email = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(patron_email, email):
-        return False, "Formato de email inválido"
-    return True, "Email válido"
-
 def validar_nombre(nombre):
     if not nombre or not nombre.strip():
         return False, "El nombre no puede estar vacío"
@@ -150,9 +147,11 @@ def init_db():
             subscribed       INTEGER DEFAULT 1,
             created_at       TEXT    NOT NULL,
             unsubscribed_at  TEXT,
-            rating           INTEGER
+            rating           INTEGER,
+            rated_at         TEXT
         )
     """)
+    init_rating_schema(conn)
     conn.commit()
     conn.close()
 
@@ -175,14 +174,11 @@ def upsert_subscription(email, first_name, vehicle, service_date):
     conn.close()
 
 def update_rating_db(email, rating):
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("""
-        UPDATE subscriptions
-        SET rating = ?
-        WHERE email = ?
-    """, (rating, email))
-    conn.commit()
-    conn.close()
+    update_ratings_db([(email, rating)])
+
+def update_ratings_db(ratings):
+    """Aplica los ratings en una transacción y devuelve los pares actualizados."""
+    return _update_ratings_db(DB_FILE, ratings)
 
 # --- Mailchimp API ---
 def subscribe_mailchimp(email, first_name, vehicle, service_date):
@@ -213,6 +209,9 @@ def update_rating_mailchimp(email, rating):
         logging.error(f"Mailchimp rating error: {e.text}")
         raise
 
+def update_ratings_mailchimp(ratings):
+    return _update_ratings_mailchimp(mc, MC_LIST_ID, ratings)
+
 # --- CLI principal ---
 def main():
     print("\n=== Suscripción de Cliente ===\n")
@@ -0,0 +1,71 @@
+import sys
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def importar(monkeypatch):
+    monkeypatch.setenv("MAILCHIMP_API_KEY", "clave-us1")
+    monkeypatch.setenv("MAILCHIMP_SERVER", "us1")
+    monkeypatch.setenv("MAILCHIMP_LIST_ID", "lista")
+    return importlib.import_module("importar_ratings")
+
+
+def escribir_csv(tmp_path, contenido, encoding="utf-8"):
+    ruta = tmp_path / "ratings.csv"
+    ruta.write_text(contenido, encoding=encoding)
+    return str(ruta)
+
+
+def test_leer_ratings_con_bom(importar, tmp_path):
+    ruta = escribir_csv(tmp_path, "email,rating\na@x.com,4\n", encoding="utf-8-sig")
+    assert importar.leer_ratings(ruta) == ([("a@x.com", 4)], [])
+
+
+def test_leer_ratings_rating_vacio_y_email_invalido(importar, tmp_path):
+    ruta = escribir_csv(tmp_path, "email,rating\na@x.com,\nno-es-email,3\nb@x.com,2\n")
+    pares, errores = importar.leer_ratings(ruta)
+    assert pares == [("b@x.com", 2)]
+    assert errores == [
+        "Línea 2: La calificación es obligatoria",
+        "Línea 3: Formato de email inválido",
+    ]
+
+
+def test_leer_ratings_ultimo_rating_gana(importar, tmp_path):
+    ruta = escribir_csv(tmp_path, "email,rating\na@x.com,1\nb@x.com,3\na@x.com,5\n")
+    assert importar.leer_ratings(ruta) == ([("a@x.com", 5), ("b@x.com", 3)], [])
+
+
+@pytest.fixture
+def ejecutar_main(importar, tmp_path, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(importar, "init_db", lambda: None)
+    monkeypatch.setattr(importar, "update_ratings_mailchimp",
+                        lambda pares: llamadas.append(pares) or "batch-1")
+
+    def ejecutar(contenido, existentes):
+        ruta = escribir_csv(tmp_path, contenido)
+        monkeypatch.setattr(importar, "update_ratings_db",
+                            lambda pares: [p for p in pares if p[0] in existentes])
+        monkeypatch.setattr(sys, "argv", ["importar_ratings.py", ruta])
+        importar.main()
+        return llamadas
+
+    return ejecutar
+
+
+def test_main_informa_desconocidos(ejecutar_main, capsys):
+    llamadas = ejecutar_main("email,rating\na@x.com,4\nz@x.com,2\n", {"a@x.com"})
+    salida = capsys.readouterr().out
+    assert "No existe el usuario: z@x.com" in salida
+    assert "Batch de Mailchimp: batch-1" in salida
+    assert llamadas == [[("a@x.com", 4)]]
+
+
+def test_main_sin_actualizados_no_llama_a_mailchimp(ejecutar_main, capsys):
+    llamadas = ejecutar_main("email,rating\nz@x.com,2\n", set())
+    salida = capsys.readouterr().out
+    assert "0 calificaciones registradas de 1 leídas" in salida
+    assert llamadas == []
@@ -0,0 +1,236 @@
+import os
+import sqlite3
+import importlib
+from unittest import mock
+
+import pytest
+
+from comun import init_rating_schema, update_ratings_db, update_ratings_mailchimp
+
+
+def crear_db(ruta, filas):
+    """Crea una tabla subscriptions sin columnas de rating, como las bases antiguas."""
+    conn = sqlite3.connect(ruta)
+    conn.execute("""
+        CREATE TABLE subscriptions (
+            id               INTEGER PRIMARY KEY AUTOINCREMENT,
+            email            TEXT    UNIQUE NOT NULL,
+            first_name       TEXT,
+            vehicle          TEXT,
+            service_date     TEXT,
+            subscribed       INTEGER DEFAULT 1,
+            created_at       TEXT    NOT NULL,
+            unsubscribed_at  TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO subscriptions (email, created_at) VALUES (?, ?)", filas
+    )
+    conn.commit()
+    conn.close()
+
+
+def agregados(ruta):
+    conn = sqlite3.connect(ruta)
+    filas = conn.execute(
+        "SELECT day, rating_count, rating_sum FROM rating_daily "
+        "WHERE rating_count > 0 ORDER BY day"
+    ).fetchall()
+    conn.close()
+    return filas
+
+
+@pytest.fixture
+def db(tmp_path):
+    ruta = str(tmp_path / "reservas.db")
+    crear_db(ruta, [
+        ("a@x.com", "2025-01-01T10:00:00"),
+        ("b@x.com", "2025-01-02T10:00:00"),
+    ])
+    conn = sqlite3.connect(ruta)
+    init_rating_schema(conn)
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+def test_backfill_de_ratings_antiguos_es_idempotente(tmp_path):
+    ruta = str(tmp_path / "reservas.db")
+    crear_db(ruta, [("a@x.com", "2025-01-01T10:00:00")])
+    conn = sqlite3.connect(ruta)
+    conn.execute("ALTER TABLE subscriptions ADD COLUMN rating INTEGER")
+    conn.execute("UPDATE subscriptions SET rating = 4")
+    conn.commit()
+    for _ in range(2):
+        init_rating_schema(conn)
+        conn.commit()
+    conn.close()
+    assert agregados(ruta) == [("2025-01-01", 1, 4)]
+
+
+def test_rerating_mueve_el_conteo_al_nuevo_dia(db):
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "UPDATE subscriptions SET rating = 3, rated_at = '2025-01-01T12:00:00' "
+        "WHERE email = 'a@x.com'"
+    )
+    conn.commit()
+    conn.execute(
+        "UPDATE subscriptions SET rating = 5, rated_at = '2025-02-01T12:00:00' "
+        "WHERE email = 'a@x.com'"
+    )
+    conn.commit()
+    conn.close()
+    assert agregados(db) == [("2025-02-01", 1, 5)]
+
+
+def test_update_ratings_db_devuelve_solo_los_existentes(db):
+    actualizados = update_ratings_db(db, [("a@x.com", 2), ("z@x.com", 1), ("b@x.com", 5)])
+    assert actualizados == [("a@x.com", 2), ("b@x.com", 5)]
+    (_, count, total), = agregados(db)
+    assert (count, total) == (2, 7)
+
+
+def test_update_ratings_db_conserva_el_error_de_lock(db, monkeypatch):
+    bloqueo = sqlite3.connect(db, isolation_level=None)
+    bloqueo.execute("BEGIN IMMEDIATE")
+    real_connect = sqlite3.connect
+    monkeypatch.setattr(
+        sqlite3, "connect",
+        lambda *args, **kwargs: real_connect(*args, **{**kwargs, "timeout": 0})
+    )
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            update_ratings_db(db, [("a@x.com", 2)])
+    finally:
+        bloqueo.execute("ROLLBACK")
+        bloqueo.close()
+
+
+def test_update_ratings_mailchimp_usa_un_solo_batch():
+    mc = mock.MagicMock()
+    mc.batches.start.return_value = {"id": "batch-1"}
+    assert update_ratings_mailchimp(mc, "lista", [("A@x.com", 4), ("b@x.com", 2)]) == "batch-1"
+    mc.batches.start.assert_called_once()
+    operations = mc.batches.start.call_args[0][0]["operations"]
+    assert [op["method"] for op in operations] == ["PATCH", "PATCH"]
+    assert all(op["path"].startswith("/lists/lista/members/") for op in operations)
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = importlib.import_module("app")
+    ruta = str(tmp_path / "ratings.db")
+    crear_db(ruta, [("a@x.com", "2025-01-01T10:00:00")])
+    monkeypatch.setattr(app, "DB_FILE", ruta)
+    app.init_db()
+    mc = mock.MagicMock()
+    mc.batches.start.return_value = {"id": "batch-1"}
+    monkeypatch.setattr(app, "mc", mc)
+    return app.app.test_client(), mc, ruta
+
+
+@pytest.mark.parametrize("item", [
+    {"email": ["a@x.com"], "rating": 3},
+    {"email": 5, "rating": 3},
+    {"email": "no-es-email", "rating": 3},
+    {"email": "  ", "rating": 3},
+    {"email": "a@x.com", "rating": 6},
+    {"email": "a@x.com", "rating": True},
+    {"email": "a@x.com"},
+])
+def test_post_ratings_rechaza_entradas_invalidas(cliente, item):
+    client, mc, _ = cliente
+    resp = client.post("/ratings", json={"ratings": [{"email": "a@x.com", "rating": 1}, item]})
+    assert resp.status_code == 400
+    assert resp.get_json()["message"].startswith("ratings[1]")
+    mc.batches.start.assert_not_called()
+
+
+def test_post_ratings_ultimo_rating_gana_y_omite_desconocidos(cliente):
+    client, mc, ruta = cliente
+    resp = client.post("/ratings", json={"ratings": [
+        {"email": " a@x.com ", "rating": 2},
+        {"email": "z@x.com", "rating": 4},
+        {"email": "a@x.com", "rating": 5},
+    ]})
+    assert resp.status_code == 200
+    cuerpo = resp.get_json()
+    assert cuerpo["updated"] == 1
+    assert cuerpo["not_found"] == ["z@x.com"]
+    assert cuerpo["batch_id"] == "batch-1"
+    operations = mc.batches.start.call_args[0][0]["operations"]
+    assert len(operations) == 1
+    assert '"RATING": 5' in operations[0]["body"]
+    (_, count, total), = agregados(ruta)
+    assert (count, total) == (1, 5)
+
+
+def test_post_ratings_sin_existentes_no_llama_a_mailchimp(cliente):
+    client, mc, _ = cliente
+    resp = client.post("/ratings", json={"ratings": [{"email": "z@x.com", "rating": 4}]})
+    assert resp.status_code == 200
+    assert resp.get_json()["batch_id"] is None
+    mc.batches.start.assert_not_called()
+
+
+def test_insert_y_delete_mantienen_los_agregados(db):
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "INSERT INTO subscriptions (email, created_at, rating, rated_at) "
+        "VALUES ('c@x.com', '2025-03-01T09:00:00', 4, '2025-03-01T09:00:00')"
+    )
+    conn.commit()
+    assert agregados(db) == [("2025-03-01", 1, 4)]
+    conn.execute("DELETE FROM subscriptions WHERE email = 'c@x.com'")
+    conn.commit()
+    conn.close()
+    assert agregados(db) == []
+
+
+def test_post_ratings_informa_fallo_de_mailchimp_tras_guardar(cliente):
+    client, mc, ruta = cliente
+    mc.batches.start.side_effect = RuntimeError("mailchimp caído")
+    resp = client.post("/ratings", json={"ratings": [
+        {"email": "a@x.com", "rating": 4},
+        {"email": "z@x.com", "rating": 2},
+    ]})
+    assert resp.status_code == 502
+    cuerpo = resp.get_json()
+    assert cuerpo["success"] is False
+    assert cuerpo["updated"] == 1
+    assert cuerpo["not_found"] == ["z@x.com"]
+    assert cuerpo["mailchimp_error"] == "mailchimp caído"
+    (_, count, total), = agregados(ruta)
+    assert (count, total) == (1, 4)
+
+
+def test_consultar_usuarios_lee_durante_un_batch_sin_escribir(db, monkeypatch, capsys):
+    import consultar_usuarios
+    monkeypatch.chdir(os.path.dirname(db))
+    update_ratings_db(db, [("a@x.com", 3)])
+    bloqueo = sqlite3.connect(db, isolation_level=None)
+    bloqueo.execute("BEGIN IMMEDIATE")
+    try:
+        consultar_usuarios.mostrar_estadisticas()
+    finally:
+        bloqueo.execute("ROLLBACK")
+        bloqueo.close()
+    salida = capsys.readouterr().out
+    assert "Usuarios con rating: 1" in salida
+    assert "Error" not in salida
+
+
+def test_consultar_usuarios_avisa_si_faltan_agregados(tmp_path, monkeypatch, capsys):
+    import consultar_usuarios
+    crear_db(str(tmp_path / "reservas.db"), [("a@x.com", "2025-01-01T10:00:00")])
+    monkeypatch.chdir(tmp_path)
+    consultar_usuarios.mostrar_estadisticas()
+    salida = capsys.readouterr().out
+    assert "Total de usuarios: 1" in salida
+    assert "Faltan los agregados de rating" in salida
+    conn = sqlite3.connect(str(tmp_path / "reservas.db"))
+    tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master")}
+    conn.close()
+    assert "rating_daily" not in tablas